@@ -1,78 +1,150 @@
 import google.generativeai as genai
-from datetime import datetime, timedelta
+import asyncio
+import hashlib
+from datetime import date, datetime, timedelta, timezone
 import uuid
 from typing import List, Dict, Any, Optional
 import logging
 import re
+from string import Template
 import math
+from dataclasses import dataclass
 from dateutil import parser
+from cachetools import TTLCache
 from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
 
 from config import Config
-from database import get_database
+from database import (
+    get_work_updates_collection, get_followup_sessions_collection,
+    get_followup_batch_sessions_collection
+)
 from models import SessionStatus
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(slots=True)
+class WorkContext:
+    """Current work update fields, extracted once per request"""
+    text: str = ""
+    description: str = ""
+    challenges: str = ""
+    plans: str = ""
+
+
+# Precompiled pattern for stripping "**Label**:" markdown from AI responses
+_MD_LABEL = re.compile(r'\*\*.*?\*\*:\s*')
+
+
+def _strip_number_prefix(line: str) -> Optional[str]:
+    """Return line without a leading "1." / "1)" prefix, or None if it has none"""
+    i = 0
+    while i < len(line) and line[i].isdigit():
+        i += 1
+    if i == 0 or i == len(line) or line[i] not in '.)':
+        return None
+    return line[i + 1:].lstrip()
+
+
+def _clean_field(doc: Dict[str, Any], key: str) -> str:
+    """Return a stripped text field from a document, or "" if missing/empty"""
+    value = doc.get(key)
+    return value.strip() if value else ""
+
+
+def _strip_markdown_labels(text: str) -> str:
+    """Remove "**Label**:" markdown prefixes"""
+    return _MD_LABEL.sub('', text) if '**' in text else text
+
+
+# Prompt boilerplate for question generation, filled in by _build_ai_prompt
+_PROMPT_TEMPLATE = Template("""You're helping a supervisor create simple, easy-to-answer follow-up questions for an intern's daily work update.
+
+**Today's Work:** $today
+**What They Planned (from yesterday):** $yesterday
+**Current Challenges:** $challenges
+**Recent Work History:** $history
+
+Generate exactly 3 simple questions that:
+1. Are easy to answer with 1-2 sentences
+2. Sound friendly and conversational to understand progress without being demanding
+3. Focus on today's work specifically 
+4. When says they completed a task,ask them to describe the steps they followed in a general but specific-enough way, so we can understand how the work was approached and verify it was actually done
+7. If $yesterday exists verify $today matches $yesterday naturally .
+
+
+Avoid questions about:
+- Feelings or emotions
+- Complex technical details
+- Long explanations
+
+Format your response as:
+1. [First simple question] 
+2. [Second simple question]
+3. [Third simple question]""")
+
+# Gemini client is configured once per process (Config is validated at import)
+genai.configure(api_key=Config.GOOGLE_API_KEY)
+_MODEL = genai.GenerativeModel(Config.GEMINI_MODEL)
+
+# Gemini responses keyed by a hash of model + prompt
+_prompt_cache = TTLCache(maxsize=Config.GEMINI_CACHE_MAX_SIZE, ttl=Config.GEMINI_CACHE_TTL_SECONDS)
+
 class AIFollowupService:
     def __init__(self):
-        "Initialize AI service with Gemini model"
-        if not Config.GOOGLE_API_KEY:
-            raise ValueError("Google API key is required")
-            
-        genai.configure(api_key=Config.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
-        self.db = get_database()
+        "Initialize AI service with the shared Gemini model"
+        self.model = _MODEL
         
-    async def generate_followup_questions(self, user_id: str, work_update_data: Optional[Dict[str, Any]] = None) -> List[str]:
+    async def generate_followup_questions(self, user_id: str, work_update_data: Optional[Dict[str, Any]] = None, interactive: bool = True) -> List[str]:
         "Generate follow-up questions based on current work update and history"
         try:
             logger.info(f"Starting AI question generation for user: {user_id}")
             
             # Get user's recent work updates (last 7 days) for context
-            week_ago = datetime.now() - timedelta(days=7)
-            
-            # Query BOTH permanent AND temporary collections
-            work_updates_collection = self.db[Config.WORK_UPDATES_COLLECTION]
-            temp_updates_collection = self.db[Config.TEMP_WORK_UPDATES_COLLECTION]
-            
-            # Get permanent work updates
-            permanent_cursor = work_updates_collection.find({"userId": user_id})
-            permanent_updates = await permanent_cursor.to_list(None)
-            
-            # Get temporary work updates  
-            temp_cursor = temp_updates_collection.find({"userId": user_id})
-            temp_updates = await temp_cursor.to_list(None)
-            
-            # Combine both collections
-            all_work_updates = permanent_updates + temp_updates
-            
-            # Filter and sort in memory
-            filtered_docs = []
-            for doc in all_work_updates:
-                timestamp = self._extract_timestamp(doc)
-                if timestamp and timestamp > week_ago:
-                    filtered_docs.append(doc)
-            
-            # Sort by timestamp (newest first) and limit to 10
-            filtered_docs.sort(key=lambda x: self._extract_timestamp(x) or datetime.min, reverse=True)
-            recent_docs = filtered_docs[:10]
-            
-            logger.info(f"Found {len(recent_docs)} work updates in last 7 days (out of {len(all_work_updates)} total from both collections)")
+            week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+            
+            # Query BOTH permanent AND temporary collections in one server-side pipeline,
+            # returning only the 10 newest updates from the last 7 days
+            work_updates_collection = get_work_updates_collection()
+            recent_stages = [
+                {"$match": {"userId": user_id, "submittedAt": {"$gt": week_ago}}},
+                {"$sort": {"submittedAt": DESCENDING}},
+                {"$limit": 10},
+                # Only the fields used to build the prompt
+                {"$project": {"description": 1, "challenges": 1, "plans": 1, "submittedAt": 1, "update_date": 1}}
+            ]
+            pipeline = recent_stages + [
+                {"$unionWith": {"coll": Config.TEMP_WORK_UPDATES_COLLECTION, "pipeline": recent_stages}},
+                {"$sort": {"submittedAt": DESCENDING}},
+                {"$limit": 10}
+            ]
+            
+            # Stream results and stop as soon as we have enough
+            recent_docs = []
+            cursor = await work_updates_collection.aggregate(pipeline)
+            try:
+                async for doc in cursor:
+                    recent_docs.append(doc)
+                    if len(recent_docs) >= 10:
+                        break
+            finally:
+                await cursor.close()
+            
+            logger.info(f"Found {len(recent_docs)} work updates in last 7 days from both collections")
             
             # Build context from current work update and history
-            current_context = self._build_current_work_context(work_update_data) if work_update_data else ""
+            current_context = self._build_current_work_context(work_update_data) if work_update_data else WorkContext()
             history_context = self._build_work_history_context(recent_docs) if recent_docs else ""
             
             # Generate AI prompt
             prompt = self._build_ai_prompt(current_context, history_context, recent_docs)
             
-            logger.info("Sending request to Gemini AI...")
-            response = self.model.generate_content(prompt)
+            response_text = await self._generate_text(prompt, interactive=interactive)
             
-            if response.text and response.text.strip():
-                logger.info(f"Received AI response: {response.text[:100]}...")
-                questions = self._parse_questions_from_response(response.text)
+            if response_text and response_text.strip():
+                logger.info(f"Received AI response: {response_text[:100]}...")
+                questions = self._parse_questions_from_response(response_text)
                 
                 if len(questions) >= 3:
                     logger.info(f"Successfully generated {len(questions)} AI questions")
@@ -90,6 +162,69 @@ class AIFollowupService:
             logger.error(f"Stack trace: {traceback.format_exc()}")
             return self._get_default_questions()
     
+    async def generate_followup_questions_batch(self, user_ids: List[str], max_concurrency: int = 5) -> Dict[str, str]:
+        """Generate and save follow-up sessions for many users (non-interactive bulk path)
+        
+        Users who already have an interactive or batch session for today are skipped
+        before calling Gemini; only newly created sessions are returned.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        session_date = date.today().isoformat()
+        
+        existing_query = {"userId": {"$in": user_ids}, "session_date": session_date}
+        interactive_users, batch_users = await asyncio.gather(
+            get_followup_sessions_collection().distinct("userId", existing_query),
+            get_followup_batch_sessions_collection().distinct("userId", existing_query)
+        )
+        users_with_session = set(interactive_users) | set(batch_users)
+        if users_with_session:
+            logger.info(f"Skipping {len(users_with_session)} users that already have a session for {session_date}")
+        
+        async def generate_for_user(user_id: str) -> Optional[str]:
+            if user_id in users_with_session:
+                return None
+            async with semaphore:
+                try:
+                    questions = await self.generate_followup_questions(user_id, interactive=False)
+                    return await self.save_followup_session(user_id, questions, session_date)
+                except DuplicateKeyError:
+                    # Another run saved a session for this user in the meantime
+                    logger.info(f"Batch session already exists for user {user_id} on {session_date}")
+                    return None
+                except Exception as e:
+                    logger.error(f"Batch question generation failed for user {user_id}: {e}")
+                    return None
+        
+        session_ids = await asyncio.gather(*(generate_for_user(user_id) for user_id in user_ids))
+        
+        results = {
+            user_id: session_id
+            for user_id, session_id in zip(user_ids, session_ids)
+            if session_id
+        }
+        logger.info(f"Batch generated follow-up sessions for {len(results)}/{len(user_ids)} users")
+        return results
+    
+    async def _generate_text(self, prompt: str, interactive: bool = True) -> Optional[str]:
+        "Generate text for a prompt, reusing cached responses for identical prompts"
+        cache_key = hashlib.blake2b(
+            f"{Config.GEMINI_MODEL}\n{prompt}".encode(), digest_size=16
+        ).hexdigest()
+        
+        cached_text = _prompt_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info(f"Using cached Gemini response for prompt {cache_key}")
+            return cached_text
+        
+        logger.info("Sending request to Gemini AI...")
+        # Bound latency on the user-facing path; callers fall back to default questions on timeout
+        request_options = {"timeout": Config.GEMINI_INTERACTIVE_TIMEOUT_SECONDS} if interactive else None
+        response = await self.model.generate_content_async(prompt, request_options=request_options)
+        
+        if response.text and response.text.strip():
+            _prompt_cache[cache_key] = response.text
+        return response.text
+    
     def _extract_timestamp(self, doc: Dict[str, Any]) -> Optional[datetime]:
         "Extract timestamp from document"
         timestamp = None
@@ -103,126 +238,127 @@ class AIFollowupService:
                 timestamp = date_field
             elif isinstance(date_field, str):
                 try:
-                    timestamp = parser.parse(date_field)
-                except Exception as e:
-                    logger.warning(f"Error parsing date string: {date_field}")
+                    # ISO-8601 is the common storage format; avoid dateutil when possible
+                    timestamp = datetime.fromisoformat(date_field)
+                except ValueError:
+                    try:
+                        timestamp = parser.parse(date_field)
+                    except Exception as e:
+                        logger.warning(f"Error parsing date string: {date_field}")
+        # Legacy documents may hold naive values; treat them as UTC so they
+        # compare cleanly against the aware UTC clock
+        if isinstance(timestamp, datetime) and timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
         return timestamp
     
-    def _build_current_work_context(self, work_data: Dict[str, Any]) -> str:
-        "Build context string from current work update"
+    def _build_current_work_context(self, work_data: Dict[str, Any]) -> WorkContext:
+        "Build context from current work update"
         context_lines = ["CURRENT WORK UPDATE:"]
         
         # Work description (required)
-        description = work_data.get('description', '').strip()
+        description = _clean_field(work_data, 'description')
         if description:
             context_lines.append(f"Work Description: {description}")
         
         # Challenges (optional)
-        challenges = work_data.get('challenges', '').strip() if work_data.get('challenges') else None
+        challenges = _clean_field(work_data, 'challenges')
         if challenges:
             context_lines.append(f"Challenges Today: {challenges}")
         
-       
+        # Plans (optional, not included in the context text)
+        plans = _clean_field(work_data, 'plans')
         
         context_lines.append("---")
-        return '\n'.join(context_lines)
+        return WorkContext(
+            text='\n'.join(context_lines),
+            description=description,
+            challenges=challenges,
+            plans=plans
+        )
     
     def _build_work_history_context(self, docs: List[Dict[str, Any]]) -> str:
         "Build context string from work update history"
-        context_lines = ["RECENT WORK HISTORY:"]
+        return '\n'.join(["RECENT WORK HISTORY:"] + [self._format_history_entry(doc) for doc in docs])
+    
+    def _format_history_entry(self, doc: Dict[str, Any]) -> str:
+        "Format a single work update for the history context"
+        date_time = self._extract_timestamp(doc)
+        description = _clean_field(doc, 'description')
+        challenges = _clean_field(doc, 'challenges')
+        plans = _clean_field(doc, 'plans')
         
-        for i, doc in enumerate(docs):
-            date_time = self._extract_timestamp(doc)
-            description = doc.get('description', '').strip()
-            challenges = doc.get('challenges', '').strip() if doc.get('challenges') else None
-            plans = doc.get('plans', '').strip() if doc.get('plans') else None
-            
-            date_str = date_time.strftime('%Y-%m-%d') if date_time else 'Unknown'
-            
-            context_lines.append(f"Date: {date_str}")
-            if description:
-                context_lines.append(f"Work: {description}")
-            if challenges:
-                context_lines.append(f"Challenges: {challenges}")
-            if plans:
-                context_lines.append(f"Plans: {plans}")
-            context_lines.append("---")
+        date_str = date_time.strftime('%Y-%m-%d') if date_time else 'Unknown'
         
-        return '\n'.join(context_lines)
+        entry = f"Date: {date_str}\n"
+        if description:
+            entry += f"Work: {description}\n"
+        if challenges:
+            entry += f"Challenges: {challenges}\n"
+        if plans:
+            entry += f"Plans: {plans}\n"
+        return entry + "---"
     
-    def _build_ai_prompt(self, current_context: str, history_context: str, recent_docs: List[Dict[str, Any]]) -> str:
+    def _build_ai_prompt(self, current_context: WorkContext, history_context: str, recent_docs: List[Dict[str, Any]]) -> str:
         "Build AI prompt for question generation"
         
         # Extract data for the prompt template
-        today_work_update = current_context
+        today_work_update = current_context.text
         yesterday_plans = self._extract_yesterday_plans_from_recent_docs(recent_docs)
         current_challenges = self._extract_current_challenges(current_context)
         seven_day_history = history_context
 
- 
-
-
-
-        prompt = f"""You're helping a supervisor create simple, easy-to-answer follow-up questions for an intern's daily work update.
-
-**Today's Work:** {today_work_update}
-**What They Planned (from yesterday):** {yesterday_plans}
-**Current Challenges:** {current_challenges}
-**Recent Work History:** {seven_day_history}
-
-Generate exactly 3 simple questions that:
-1. Are easy to answer with 1-2 sentences
-2. Sound friendly and conversational to understand progress without being demanding
-3. Focus on today's work specifically 
-4. When says they completed a task,ask them to describe the steps they followed in a general but specific-enough way, so we can understand how the work was approached and verify it was actually done
-7. If {yesterday_plans} exists verify {today_work_update} matches {yesterday_plans} naturally .
-
-
-Avoid questions about:
-- Feelings or emotions
-- Complex technical details
-- Long explanations
-
-Format your response as:
-1. [First simple question] 
-2. [Second simple question]
-3. [Third simple question]"""
-
-        return prompt
+        return _PROMPT_TEMPLATE.substitute(
+            today=today_work_update,
+            yesterday=yesterday_plans,
+            challenges=current_challenges,
+            history=seven_day_history
+        )
         
  
     
+    def _extract_update_date(self, doc: Dict[str, Any], timestamp: Optional[datetime]) -> Optional[date]:
+        "Calendar day the update was saved under, falling back to the local day of its timestamp"
+        update_date = doc.get('update_date')
+        if isinstance(update_date, str):
+            try:
+                return date.fromisoformat(update_date)
+            except ValueError:
+                logger.warning(f"Error parsing update_date: {update_date}")
+        return timestamp.astimezone().date() if timestamp else None
+    
     def _extract_yesterday_plans_from_recent_docs(self, recent_docs: List[Dict[str, Any]]) -> str:
         """Extract yesterday's plans from the most recent work update that has plans"""
         if not recent_docs:
             return "No previous plans found"
         
-        yesterday = datetime.now().date() - timedelta(days=1)
+        # update_date keys are the server-local calendar day, so compare on the same clock
+        today = date.today()
+        yesterday = today - timedelta(days=1)
         
-        # First, try to find plans from exactly yesterday
-        for doc in recent_docs:
-            timestamp = self._extract_timestamp(doc)
-            if timestamp and timestamp.date() == yesterday:
-                plans = doc.get('plans', '').strip()
-                if plans:
-                    logger.info(f"Found yesterday's plans from {timestamp.date()}: {plans[:50]}...")
-                    return plans
-        
-        # If no plans found for yesterday, get the most recent plans available
-        # (excluding today's entry if it exists)
-        today = datetime.now().date()
+        # Prefer plans from exactly yesterday; otherwise fall back to the most
+        # recent plans available (excluding today's entry if it exists)
+        fallback_plans = None
+        fallback_date_str = None
         
         for doc in recent_docs:
-            timestamp = self._extract_timestamp(doc)
-            # Skip today's entries
-            if timestamp and timestamp.date() == today:
+            plans = _clean_field(doc, 'plans')
+            if not plans:
                 continue
-                
-            plans = doc.get('plans', '').strip()
-            if plans:
-                date_str = timestamp.strftime('%Y-%m-%d') if timestamp else 'Unknown date'
-                logger.info(f"Found most recent plans from {date_str}: {plans[:50]}...")
+            
+            timestamp = self._extract_timestamp(doc)
+            update_date = self._extract_update_date(doc, timestamp)
+            
+            if update_date == yesterday:
+                logger.info(f"Found yesterday's plans from {update_date}: {plans[:50]}...")
                 return plans
+            
+            if fallback_plans is None and update_date != today:
+                fallback_plans = plans
+                fallback_date_str = update_date.isoformat() if update_date else 'Unknown date'
+        
+        if fallback_plans:
+            logger.info(f"Found most recent plans from {fallback_date_str}: {fallback_plans[:50]}...")
+            return fallback_plans
         
         logger.info("No previous plans found in recent work updates")
         return "No previous plans found"
@@ -233,90 +369,65 @@ Format your response as:
         # But keeping it in case it's called elsewhere
         return self._extract_yesterday_plans_from_recent_docs([])
     
-    def _extract_current_challenges(self, current_context: str) -> str:
+    def _extract_current_challenges(self, current_context: WorkContext) -> str:
         """Extract current challenges from current work context"""
-        lines = current_context.split('\n')
-        challenges = "No challenges mentioned"
-        
-        for line in lines:
-            if line.strip().startswith('Challenges Today:'):
-                challenges = line.replace('Challenges Today:', '').strip()
-                break
-        
-        return challenges
+        return current_context.challenges or "No challenges mentioned"
     
-    def _extract_tomorrow_plans(self, current_context: str) -> str:
+    def _extract_tomorrow_plans(self, current_context: WorkContext) -> str:
         """Extract tomorrow's plans from current work context"""
-        lines = current_context.split('\n')
-        plans = "No plans mentioned"
-        
-        for line in lines:
-            if line.strip().startswith('Plans for Tomorrow:'):
-                plans = line.replace('Plans for Tomorrow:', '').strip()
-                break
-        
-        return plans
+        return current_context.plans or "No plans mentioned"
     
     def _parse_questions_from_response(self, response: str) -> List[str]:
-        questions = []
         logger.info("Parsing AI response for questions...")
         logger.info(f"Full AI response: {response}")
         
-        # Split by lines
-        lines = response.split('\n')
+        # Single pass over the response, collecting candidates for each format:
+        # "**Question Text**: ..." lines, numbered lines, and any line containing a question
+        structured_questions = []
+        numbered_questions = []
+        pattern_questions = []
         
-        # Method 1: Look for "Question Text" patterns
-        for line in lines:
+        for line in response.split('\n'):
             trimmed = line.strip()
+            if not trimmed:
+                continue
+            
+            # Structured format
             if trimmed.startswith('**Question Text**'):
                 # Extract text after the colon
                 question = trimmed.split(':', 1)[-1].strip()
-                if question and len(question) > 10:
-                    questions.append(question)
-                    logger.info(f"Parsed structured question {len(questions)}: {question[:50]}...")
-        
-        # Method 2: Look for numbered questions if structured format didn't work
-        if len(questions) < 3:
-            logger.info("Structured format parsing yielded few results, trying numbered format...")
-            questions = []  # Reset
-            
-            for line in lines:
-                trimmed = line.strip()
-                # Look for lines that start with numbers (1., 2., etc.) or (1), (2), etc.
-                if re.match(r'^\d+[.\)]\s*', trimmed):
-                    # Remove the number and clean up the question
-                    question = re.sub(r'^\d+[.\)]\s*', '', trimmed).strip()
-                    # Remove any markdown formatting
-                    question = re.sub(r'\*\*.*?\*\*:\s*', '', question)
-                    if question and len(question) > 10:
-                        questions.append(question)
-                        logger.info(f"Parsed numbered question {len(questions)}: {question[:50]}...")
-        
-        # Method 3: Look for question patterns anywhere in the text
-        if len(questions) < 3:
-            logger.info("Numbered format parsing yielded few results, trying pattern matching...")
-            questions = []  
-            
-            
-            for line in lines:
-                trimmed = line.strip()
-                # Skip empty lines and headers
-                if not trimmed or trimmed.startswith('#') or trimmed.startswith('**') and not trimmed.endswith('?'):
+                if len(question) > 10:
+                    structured_questions.append(question)
+                    logger.info(f"Parsed structured question {len(structured_questions)}: {question[:50]}...")
+                    # Structured questions take precedence, so three of them settle it; other
+                    # formats must keep scanning since structured lines may still follow
+                    if len(structured_questions) == 3:
+                        break
+            
+            # Numbered format: 1. / 1) prefixes
+            unnumbered = _strip_number_prefix(trimmed) if trimmed[:1].isdigit() else None
+            if unnumbered is not None and len(numbered_questions) < 3:
+                question = _strip_markdown_labels(unnumbered)
+                if len(question) > 10:
+                    numbered_questions.append(question)
+                    logger.info(f"Parsed numbered question {len(numbered_questions)}: {question[:50]}...")
+            
+            # Fallback: question patterns anywhere in the text, skipping headers
+            if len(pattern_questions) < 3 and '?' in trimmed and len(trimmed) > 15:
+                if trimmed.startswith('#') or (trimmed.startswith('**') and not trimmed.endswith('?')):
                     continue
-                
-                # Look for actual questions
-                if '?' in trimmed and len(trimmed) > 15:
-                    # Clean up the question
-                    question = re.sub(r'^\d+[.\)]\s*', '', trimmed)
-                    question = re.sub(r'\*\*.*?\*\*:\s*', '', question)
-                    question = question.strip()
-                    
-                    if question and not any(q.lower() in question.lower() for q in questions):
-                        questions.append(question)
-                        logger.info(f"Parsed pattern question {len(questions)}: {question[:50]}...")
-                        
-                        if len(questions) >= 3:
-                            break
+                question = _strip_markdown_labels(unnumbered if unnumbered is not None else trimmed).strip()
+                if question and not any(q.lower() in question.lower() for q in pattern_questions):
+                    pattern_questions.append(question)
+        
+        if len(structured_questions) >= 3:
+            questions = structured_questions
+        elif len(numbered_questions) >= 3:
+            logger.info("Structured format parsing yielded few results, using numbered format")
+            questions = numbered_questions
+        else:
+            logger.info("Numbered format parsing yielded few results, using pattern matching")
+            questions = pattern_questions
         
         logger.info(f"Total questions parsed: {len(questions)}")
         
@@ -341,36 +452,39 @@ Format your response as:
             "What new skills or concepts have you learned recently that you'd like to discuss?"
         ]
     
-    async def save_followup_session(self, user_id: str, questions: List[str]) -> str:
-        """Save follow-up session to MongoDB"""
+    async def save_followup_session(self, user_id: str, questions: List[str], session_date: str = None) -> str:
+        """Save a batch-generated follow-up session to MongoDB"""
         logger.info(f"Called save_followup_session with userId: {user_id}")
         
         try:
             #formatted_date = datetime.now().strftime('%Y-%m-%d')
             #session_id = f"{user_id}_{formatted_date}"
             session_id = f"{user_id}_{uuid.uuid4().hex}"
+            session_date = session_date or date.today().isoformat()
             
-            followup_collection = self.db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+            # Kept out of followup_sessions so the interactive per-day slot stays free
+            followup_collection = get_followup_batch_sessions_collection()
             
             session_doc = {
                 "_id": session_id,
                 "userId": user_id,
+                "session_date": session_date,
                 "questions": questions,
                 "answers": [""] * len(questions),
                 "status": SessionStatus.PENDING,
-                "createdAt": datetime.now(),
+                "createdAt": datetime.now(timezone.utc),
                 "completedAt": None
             }
             
-            await followup_collection.replace_one(
-                {"_id": session_id}, 
-                session_doc, 
-                upsert=True
-            )
+            # Session ids are unique per call; the unique (userId, session_date) index
+            # rejects a second batch session for the same day
+            await followup_collection.insert_one(session_doc)
             
             logger.info(f"Follow-up session saved with ID: {session_id}")
             return session_id
             
+        except DuplicateKeyError:
+            raise
         except Exception as e:
             logger.error(f"Failed to save follow-up session: {e}")
             raise Exception(f"Failed to save follow-up session: {e}")
@@ -378,12 +492,12 @@ Format your response as:
     async def update_followup_answers(self, session_id: str, answers: List[str]) -> None:
         """Update answers for a follow-up session"""
         try:
-            followup_collection = self.db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+            followup_collection = get_followup_sessions_collection()
             
             update_doc = {
                 "answers": answers,
                 "status": SessionStatus.COMPLETED,
-                "completedAt": datetime.now()
+                "completedAt": datetime.now(timezone.utc)
             }
             
             result = await followup_collection.update_one(
@@ -403,7 +517,7 @@ Format your response as:
     async def get_pending_followup_session(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get pending follow-up session for user"""
         try:
-            followup_collection = self.db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+            followup_collection = get_followup_sessions_collection()
             
             cursor = followup_collection.find(
                 {
@@ -436,9 +550,20 @@ Format your response as:
         """Test method to check if AI is working"""
         try:
             prompt = 'Generate a simple test response: "AI is working"'
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             logger.info(f"AI Test Response: {response.text}")
             return response.text is not None and response.text.strip()
         except Exception as e:
             logger.error(f"AI Test Failed: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+# Process-wide service instance, created on first use (after MongoDB is connected)
+_ai_service: Optional[AIFollowupService] = None
+
+def get_ai_followup_service() -> AIFollowupService:
+    """Get the shared AI service instance, creating it on first call"""
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIFollowupService()
+    return _ai_service
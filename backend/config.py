@@ -9,24 +9,43 @@ class Config:
     MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME = os.getenv("DATABASE_NAME", "intern_progress")
     
+    # MongoDB Client Tuning
+    DB_MAX_POOL_SIZE = int(os.getenv("DB_MAX_POOL_SIZE", "100"))
+    DB_MIN_POOL_SIZE = int(os.getenv("DB_MIN_POOL_SIZE", "10"))
+    DB_MAX_IDLE_TIME_MS = int(os.getenv("DB_MAX_IDLE_TIME_MS", "60000"))
+    DB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("DB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    # Fail fast instead of queueing indefinitely when the pool is exhausted
+    DB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("DB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    DB_COMPRESSORS = os.getenv("DB_COMPRESSORS", "zstd,zlib")
+    
     # Google AI Configuration
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
     # Application Configuration
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+    # Uvicorn worker processes (ignored with DEBUG reload, which needs a single process)
+    UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
     
     # Collections
     WORK_UPDATES_COLLECTION = "work_updates"
     TEMP_WORK_UPDATES_COLLECTION = "temp_work_updates"  
     FOLLOWUP_SESSIONS_COLLECTION = "followup_sessions"
+    # Sessions pre-generated by the bulk path, kept apart from the interactive per-day slot
+    FOLLOWUP_BATCH_SESSIONS_COLLECTION = "followup_batch_sessions"
     
     # AI Model Configuration
     GEMINI_MODEL = "gemini-2.0-flash"
+    GEMINI_CACHE_MAX_SIZE = int(os.getenv("GEMINI_CACHE_MAX_SIZE", "1024"))
+    GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600"))
+    GEMINI_INTERACTIVE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_INTERACTIVE_TIMEOUT_SECONDS", "20"))
     
     @classmethod
     def validate_config(cls):
         """Validate required configuration"""
         if not cls.GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY environment variable is required")
-        return True
\ No newline at end of file
+        return True
+
+# Validate once at import so runtime code can rely on the configuration
+Config.validate_config()
@@ -1,36 +1,101 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import DESCENDING, ASCENDING
+from pymongo import AsyncMongoClient, DESCENDING, ASCENDING, IndexModel, ReadPreference, ReturnDocument, UpdateOne, WriteConcern
+from pymongo.errors import DuplicateKeyError
 from config import Config
 import logging
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
 class Database:
-    client: AsyncIOMotorClient = None
+    client: AsyncMongoClient = None
     database = None
+    # Collection handles, cached once connected
+    work_updates = None
+    temp_work_updates = None
+    followup_sessions = None
+    # Follow-up sessions handle for read-only endpoints, served by secondaries when available
+    followup_sessions_read = None
+    followup_batch_sessions = None
+    # Background schema migration started at connect time
+    migration_task: asyncio.Task = None
 
 database = Database()
 
 # Collection names
 TEMP_WORK_UPDATES_COLLECTION = "temp_work_updates"
+META_COLLECTION = "_meta"
+
+# Bump when a new data migration is added to migrate_existing_data()
+#   1: backfill followupCompleted on work updates
+SCHEMA_VERSION = 1
+
+# Pending follow-up sessions expire after this long (their temp work update is gone after 24h)
+PENDING_SESSION_TTL_SECONDS = 7 * 24 * 3600
+
+# Maximum number of ids per bulk delete/update command
+BULK_BATCH_SIZE = 1000
+
+# Documents updated per batch by data migrations
+MIGRATION_BATCH_SIZE = 10000
+
+# Cursor batch size for maintenance scans (fewer getMore round-trips than the default 101)
+SCAN_BATCH_SIZE = 1000
+
+# Short-lived in-process cache for read-only AI prompt data. It is per worker, so it
+# is never used for existence checks; writes in this process invalidate it and other
+# workers see changes once the TTL lapses
+LOOKUP_CACHE_MAX_SIZE = 1024
+LOOKUP_CACHE_TTL_SECONDS = 30
+_work_update_data_cache = TTLCache(maxsize=LOOKUP_CACHE_MAX_SIZE, ttl=LOOKUP_CACHE_TTL_SECONDS)
+
+# Index metadata per collection name, busted whenever this module changes indexes
+_index_cache: dict = {}
 
 async def connect_to_mongo():
     """Create database connection"""
     try:
-        database.client = AsyncIOMotorClient(Config.MONGODB_URL)
+        database.client = AsyncMongoClient(
+            Config.MONGODB_URL,
+            maxPoolSize=Config.DB_MAX_POOL_SIZE,
+            minPoolSize=Config.DB_MIN_POOL_SIZE,
+            maxIdleTimeMS=Config.DB_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=Config.DB_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=Config.DB_WAIT_QUEUE_TIMEOUT_MS,
+            compressors=Config.DB_COMPRESSORS,
+            retryWrites=True,
+            tz_aware=True
+        )
         database.database = database.client[Config.DATABASE_NAME]
+        database.work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
+        # Temp updates are disposable (TTL-expired), so skip waiting on the journal
+        database.temp_work_updates = database.database.get_collection(
+            TEMP_WORK_UPDATES_COLLECTION,
+            write_concern=WriteConcern(w=1, j=False)
+        )
+        database.followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        database.followup_sessions_read = database.database.get_collection(
+            Config.FOLLOWUP_SESSIONS_COLLECTION,
+            read_preference=ReadPreference.SECONDARY_PREFERRED
+        )
+        database.followup_batch_sessions = database.database[Config.FOLLOWUP_BATCH_SESSIONS_COLLECTION]
         
         # Test the connection
         await database.client.admin.command('ping')
         logger.info("Connected to MongoDB successfully")
         
+        # Warm the pool up to minPoolSize so startup work below runs on open sockets
+        await asyncio.gather(*[
+            database.client.admin.command('ping') for _ in range(Config.DB_MIN_POOL_SIZE)
+        ])
+        
         # Create indexes 
         await create_indexes()
         
-        # Run existing data migration
-        await migrate_existing_data()
+        # Run existing data migration in the background so startup isn't blocked
+        database.migration_task = asyncio.create_task(migrate_existing_data())
         
         # Setup cleanup routine for temp collection with TTL
         await setup_ttl_indexes()
@@ -41,17 +106,26 @@ async def connect_to_mongo():
 
 async def close_mongo_connection():
     """Close database connection"""
+    if database.migration_task and not database.migration_task.done():
+        database.migration_task.cancel()
+    
     if database.client:
-        database.client.close()
+        await database.client.close()
         logger.info("Disconnected from MongoDB")
 
+async def _get_indexes_cached(collection, force: bool = False) -> list:
+    """Get a collection's index list, fetching it from the server only when not cached"""
+    if force or collection.name not in _index_cache:
+        _index_cache[collection.name] = await (await collection.list_indexes()).to_list(length=None)
+    return _index_cache[collection.name]
+
 async def setup_ttl_indexes():
     """Setup TTL index for automatic cleanup of temp work updates"""
     try:
-        temp_collection = database.database[TEMP_WORK_UPDATES_COLLECTION]
+        temp_collection = database.temp_work_updates
         
         # Check if TTL index already exists
-        existing_indexes = await temp_collection.list_indexes().to_list(length=None)
+        existing_indexes = await _get_indexes_cached(temp_collection, force=True)
         
         # Look for existing TTL index
         ttl_index_exists = False
@@ -71,6 +145,7 @@ async def setup_ttl_indexes():
         if regular_submittedAt_index_exists and not ttl_index_exists:
             try:
                 await temp_collection.drop_index("submittedAt_1")
+                _index_cache.pop(temp_collection.name, None)
                 logger.info("Dropped regular submittedAt index to replace with TTL index")
             except Exception as e:
                 logger.warning(f"Could not drop regular submittedAt index: {e}")
@@ -82,6 +157,7 @@ async def setup_ttl_indexes():
                 expireAfterSeconds=86400,  # 24 hours in seconds
                 name="submittedAt_ttl_24h"
             )
+            _index_cache.pop(temp_collection.name, None)
             logger.info("TTL index created successfully - documents expire after 24 hours")
         
         # Verify TTL index is working
@@ -94,10 +170,10 @@ async def setup_ttl_indexes():
 async def verify_ttl_index():
     """Verify that TTL index is properly configured"""
     try:
-        temp_collection = database.database[TEMP_WORK_UPDATES_COLLECTION]
+        temp_collection = database.temp_work_updates
         
-        # Get all indexes to verify TTL setup
-        indexes = await temp_collection.list_indexes().to_list(length=None)
+        # Get all indexes to verify TTL setup (cached after the first fetch)
+        indexes = await _get_indexes_cached(temp_collection)
         
         for index in indexes:
             if 'expireAfterSeconds' in index and 'submittedAt' in index.get('key', {}):
@@ -113,49 +189,106 @@ async def verify_ttl_index():
         logger.error(f"Failed to verify TTL index: {e}")
         return False
 
+async def _drop_index_if_exists(collection, index_name: str):
+    """Drop an index by name if present (used when replacing an index definition)"""
+    if index_name in await collection.index_information():
+        await collection.drop_index(index_name)
+        _index_cache.pop(collection.name, None)
+        logger.info(f"Dropped index {index_name} on {collection.name}")
+
+async def create_work_update_indexes():
+    """Create work updates indexes in a single createIndexes command"""
+    work_updates = database.work_updates
+    
+    # Replaced by the partial user_incomplete_recent index
+    await _drop_index_if_exists(work_updates, "userId_1_followupCompleted_1")
+    
+    await work_updates.create_indexes([
+        IndexModel("userId"),
+        IndexModel([("userId", 1), ("submittedAt", DESCENDING)]),
+        IndexModel([("userId", 1), ("update_date", 1)], unique=True),  # Prevent duplicate dates
+        # Partial index for tracking incomplete follow-ups (only incomplete updates are indexed)
+        IndexModel(
+            [("userId", 1), ("followupCompleted", 1), ("submittedAt", DESCENDING)],
+            partialFilterExpression={"followupCompleted": False},
+            name="user_incomplete_recent"
+        ),
+        IndexModel([("followupCompleted", 1), ("submittedAt", DESCENDING)])
+    ])
+
+async def create_temp_work_update_indexes():
+    """Create temporary work updates indexes (non-TTL) in a single createIndexes command"""
+    # Note: submittedAt TTL index is created in setup_ttl_indexes()
+    await database.temp_work_updates.create_indexes([
+        IndexModel("userId"),
+        IndexModel([("userId", 1), ("submittedAt", DESCENDING)]),  # Recent history lookups
+        IndexModel([("userId", 1), ("update_date", 1)], unique=True),  # Prevent duplicate dates
+        IndexModel([("submittedAt", 1), ("status", 1)])  # For cleanup queries
+    ])
+
+async def create_followup_session_indexes():
+    """Create followup sessions indexes in a single createIndexes command"""
+    followup_sessions = database.followup_sessions
+    
+    # Replaced by the partial user_pending_recent index
+    await _drop_index_if_exists(followup_sessions, "userId_1_status_1_createdAt_-1")
+    
+    await followup_sessions.create_indexes([
+        IndexModel("userId"),
+        IndexModel([("userId", 1), ("createdAt", DESCENDING)]),
+        IndexModel([("userId", 1), ("session_date", 1)], unique=True),  # Date-based sessions
+        # Indexes for linking sessions to work updates
+        IndexModel("workUpdateId"),
+        IndexModel("tempWorkUpdateId"),  # For temp work update references
+        IndexModel([("workUpdateId", 1), ("status", 1)]),
+        # Partial compound index for efficient pending session queries
+        # (get_pending_followup_session: equality on userId+status, sorted by createdAt desc);
+        # only pending sessions are indexed
+        IndexModel(
+            [("userId", 1), ("status", 1), ("createdAt", DESCENDING)],
+            partialFilterExpression={"status": "pending"},
+            name="user_pending_recent"
+        ),
+        # TTL for abandoned pending sessions; completed sessions are kept
+        IndexModel(
+            "createdAt",
+            expireAfterSeconds=PENDING_SESSION_TTL_SECONDS,
+            partialFilterExpression={"status": "pending"},
+            name="pending_sessions_ttl"
+        )
+    ])
+
+async def create_followup_batch_session_indexes():
+    """Create batch follow-up sessions indexes in a single createIndexes command"""
+    await database.followup_batch_sessions.create_indexes([
+        IndexModel([("userId", 1), ("session_date", 1)], unique=True),  # One batch session per day
+        # TTL for batch sessions nobody picked up; completed sessions are kept
+        IndexModel(
+            "createdAt",
+            expireAfterSeconds=PENDING_SESSION_TTL_SECONDS,
+            partialFilterExpression={"status": "pending"},
+            name="pending_sessions_ttl"
+        )
+    ])
+
 async def create_indexes():
     """Create necessary indexes (excluding TTL - handled separately)"""
-    try:
-        # Work updates indexes
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        await work_updates.create_index("userId")
-        await work_updates.create_index([("userId", 1), ("submittedAt", DESCENDING)])
-        await work_updates.create_index([("userId", 1), ("update_date", 1)], unique=True)  # Prevent duplicate dates
-        
-        # Index for tracking incomplete follow-ups
-        await work_updates.create_index([("userId", 1), ("followupCompleted", 1)])
-        await work_updates.create_index([("followupCompleted", 1), ("submittedAt", DESCENDING)])
-        
-        # Temporary work updates indexes (non-TTL indexes)
-        temp_work_updates = database.database[TEMP_WORK_UPDATES_COLLECTION]
-        await temp_work_updates.create_index("userId")
-        await temp_work_updates.create_index([("userId", 1), ("update_date", 1)], unique=True)  # Prevent duplicate dates
-        # Note: submittedAt TTL index is created in setup_ttl_indexes()
-        await temp_work_updates.create_index([("submittedAt", 1), ("status", 1)])  # For cleanup queries
-        
-        # Followup sessions indexes  
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
-        await followup_sessions.create_index("userId")
-        await followup_sessions.create_index([("userId", 1), ("status", 1)])
-        await followup_sessions.create_index([("userId", 1), ("createdAt", DESCENDING)])
-        await followup_sessions.create_index([("userId", 1), ("session_date", 1)], unique=True)  # Date-based sessions
-        
-        # Index for linking sessions to work updates
-        await followup_sessions.create_index("workUpdateId")
-        await followup_sessions.create_index("tempWorkUpdateId")  # For temp work update references
-        await followup_sessions.create_index([("workUpdateId", 1), ("status", 1)])
-        
-        # Compound index for efficient pending session queries
-        await followup_sessions.create_index([
-            ("userId", 1), 
-            ("status", 1), 
-            ("createdAt", DESCENDING)
-        ])
-        
+    # One createIndexes command per collection, all collections in parallel
+    results = await asyncio.gather(
+        create_work_update_indexes(),
+        create_temp_work_update_indexes(),
+        create_followup_session_indexes(),
+        create_followup_batch_session_indexes(),
+        return_exceptions=True
+    )
+    _index_cache.clear()
+    
+    failures = [result for result in results if isinstance(result, Exception)]
+    for failure in failures:
+        logger.warning(f"Failed to create indexes: {failure}")
+    
+    if not failures:
         logger.info("Database indexes created successfully")
-        
-    except Exception as e:
-        logger.warning(f"Failed to create indexes: {e}")
 
 async def setup_temp_collection():
     """Legacy function - now handled by setup_ttl_indexes()"""
@@ -165,22 +298,45 @@ async def setup_temp_collection():
 async def migrate_existing_data():
     """Migrate existing work updates to include followupCompleted field"""
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
+        work_updates = database.work_updates
+        meta = database.database[META_COLLECTION]
+        
+        # Skip entirely once this schema version has been migrated
+        schema_doc = await meta.find_one({"_id": "schema_version"})
+        if schema_doc and schema_doc.get("v", 0) >= SCHEMA_VERSION:
+            logger.info("Work updates schema is up to date")
+            return
         
         # Check if migration is needed
-        sample_doc = await work_updates.find_one()
-        if sample_doc and "followupCompleted" not in sample_doc:
+        unmigrated_doc = await work_updates.find_one({"followupCompleted": {"$exists": False}}, {"_id": 1})
+        if unmigrated_doc:
             logger.info("Migrating existing work updates...")
             
-            # Update all existing work updates
-            result = await work_updates.update_many(
-                {"followupCompleted": {"$exists": False}},
-                {"$set": {"followupCompleted": True}}  # Assume old updates are complete
-            )
+            # Update existing work updates in bounded batches to avoid long locks and oplog bursts
+            migrated_count = 0
+            while True:
+                batch = await work_updates.find(
+                    {"followupCompleted": {"$exists": False}},
+                    {"_id": 1}
+                ).limit(MIGRATION_BATCH_SIZE).to_list(MIGRATION_BATCH_SIZE)
+                if not batch:
+                    break
+                
+                result = await work_updates.update_many(
+                    {"_id": {"$in": [doc["_id"] for doc in batch]}},
+                    {"$set": {"followupCompleted": True}}  # Assume old updates are complete
+                )
+                migrated_count += result.modified_count
             
-            logger.info(f"Migrated {result.modified_count} existing work updates")
+            logger.info(f"Migrated {migrated_count} existing work updates")
         else:
             logger.info("Work updates schema is up to date")
+        
+        await meta.update_one(
+            {"_id": "schema_version"},
+            {"$set": {"v": SCHEMA_VERSION, "updatedAt": datetime.now(timezone.utc)}},
+            upsert=True
+        )
             
     except Exception as e:
         logger.warning(f"Failed to migrate data: {e}")
@@ -188,25 +344,35 @@ async def migrate_existing_data():
 async def cleanup_orphaned_sessions():
     """Clean up follow-up sessions that don't have corresponding work updates"""
     try:
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        
-        # Get all sessions with workUpdateId
-        sessions_cursor = followup_sessions.find(
-            {"workUpdateId": {"$exists": True}},
-            {"workUpdateId": 1}
-        )
-        
+        followup_sessions = database.followup_sessions
+        
+        # Find orphaned sessions server-side by joining sessions to work updates
+        pipeline = [
+            # Only sessions linked to a well-formed work update id; empty, null or
+            # malformed ids are left alone
+            {"$match": {"$or": [
+                {"workUpdateId": {"$type": "string", "$regex": "^[0-9a-fA-F]{24}$"}},
+                {"workUpdateId": {"$type": "objectId"}}
+            ]}},
+            {"$addFields": {"workUpdateOid": {"$toObjectId": "$workUpdateId"}}},
+            {"$lookup": {
+                "from": Config.WORK_UPDATES_COLLECTION,
+                "localField": "workUpdateOid",
+                "foreignField": "_id",
+                "as": "workUpdate"
+            }},
+            {"$match": {"workUpdate": {"$size": 0}}},
+            {"$project": {"_id": 1}}
+        ]
+        orphaned_ids = [session["_id"] async for session in await followup_sessions.aggregate(pipeline, batchSize=SCAN_BATCH_SIZE)]
+        
+        # Remove orphaned sessions in batches to keep each command small
         orphaned_count = 0
-        async for session in sessions_cursor:
-            work_update_id = session.get("workUpdateId")
-            if work_update_id:
-                # Check if work update exists
-                work_update = await work_updates.find_one({"_id": ObjectId(work_update_id)})
-                if not work_update:
-                    # Remove orphaned session
-                    await followup_sessions.delete_one({"_id": session["_id"]})
-                    orphaned_count += 1
+        for start in range(0, len(orphaned_ids), BULK_BATCH_SIZE):
+            result = await followup_sessions.delete_many(
+                {"_id": {"$in": orphaned_ids[start:start + BULK_BATCH_SIZE]}}
+            )
+            orphaned_count += result.deleted_count
         
         if orphaned_count > 0:
             logger.info(f"Cleaned up {orphaned_count} orphaned follow-up sessions")
@@ -219,37 +385,45 @@ async def cleanup_orphaned_sessions():
 async def cleanup_abandoned_temp_updates(hours_old: int = 24):
     """Clean up temporary work updates older than specified hours and their associated sessions"""
     try:
-        temp_collection = database.database[TEMP_WORK_UPDATES_COLLECTION]
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        temp_collection = database.temp_work_updates
+        followup_sessions = database.followup_sessions
         
         # Calculate cutoff time
-        cutoff_time = datetime.now() - timedelta(hours=hours_old)
-        
-        # Find abandoned temp updates (TTL should handle most, but this is backup)
-        abandoned_cursor = temp_collection.find({
-            "submittedAt": {"$lt": cutoff_time},
-            "status": "pending_followup"
-        })
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_old)
         
         abandoned_count = 0
         deleted_sessions_count = 0
         
-        async for temp_update in abandoned_cursor:
-            temp_id = str(temp_update["_id"])
+        # Delete abandoned temp updates (TTL should handle most, but this is backup) one
+        # batch of ids at a time, so each command stays short and memory stays bounded
+        while True:
+            batch_docs = await temp_collection.find(
+                {"submittedAt": {"$lt": cutoff_time}, "status": "pending_followup"},
+                {"_id": 1}
+            ).hint([("submittedAt", 1), ("status", 1)]).limit(BULK_BATCH_SIZE).to_list(None)
+            batch_ids = [doc["_id"] for doc in batch_docs]
+            if not batch_ids:
+                break
+            batch_str_ids = [str(_id) for _id in batch_ids]
             
             # Clean up any associated sessions (both pending and completed)
             session_delete_result = await followup_sessions.delete_many({
                 "$or": [
-                    {"tempWorkUpdateId": temp_id},
-                    {"workUpdateId": temp_id}  # In case it was mistakenly set
+                    {"tempWorkUpdateId": {"$in": batch_str_ids}},
+                    {"workUpdateId": {"$in": batch_str_ids}}  # In case it was mistakenly set
                 ]
             })
-            
             deleted_sessions_count += session_delete_result.deleted_count
             
-            # Delete the temp update (backup to TTL)
-            await temp_collection.delete_one({"_id": temp_update["_id"]})
-            abandoned_count += 1
+            # Delete the temp updates (backup to TTL)
+            temp_delete_result = await temp_collection.delete_many({"_id": {"$in": batch_ids}})
+            abandoned_count += temp_delete_result.deleted_count
+            
+            if len(batch_ids) < BULK_BATCH_SIZE:
+                break
+            
+            # Let other requests run between batches
+            await asyncio.sleep(0)
         
         if abandoned_count > 0:
             logger.info(f"Manual cleanup: {abandoned_count} abandoned temp updates, {deleted_sessions_count} sessions")
@@ -270,29 +444,47 @@ async def cleanup_abandoned_temp_updates(hours_old: int = 24):
             "error": str(e)
         }
 
+async def _count_by_field(collection, field: str, values: list) -> dict:
+    """Count documents grouped by the value of a field, for the given values only"""
+    pipeline = [
+        {"$match": {field: {"$in": values}}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+    ]
+    return {group["_id"]: group["count"] async for group in await collection.aggregate(pipeline)}
+
 async def get_database_stats():
     """Get database statistics for monitoring"""
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        temp_work_updates = database.database[TEMP_WORK_UPDATES_COLLECTION]
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
-        
-        # Count work updates
-        total_work_updates = await work_updates.count_documents({})
-        completed_followups = await work_updates.count_documents({"followupCompleted": True})
-        incomplete_followups = await work_updates.count_documents({"followupCompleted": False})
+        work_updates = database.work_updates
+        temp_work_updates = database.temp_work_updates
+        followup_sessions = database.followup_sessions
+        
+        # Totals come from collection metadata (O(1), approximate is fine for monitoring);
+        # status buckets from one $group per collection. Everything runs concurrently.
+        (
+            total_work_updates, total_temp_updates, total_sessions,
+            followup_counts, temp_status_counts, session_status_counts,
+            ttl_status
+        ) = await asyncio.gather(
+            work_updates.estimated_document_count(),
+            temp_work_updates.estimated_document_count(),
+            followup_sessions.estimated_document_count(),
+            _count_by_field(work_updates, "followupCompleted", [True, False]),
+            _count_by_field(temp_work_updates, "status", ["pending_followup"]),
+            _count_by_field(followup_sessions, "status", ["pending", "completed"]),
+            verify_ttl_index()
+        )
         
-        # Count temporary work updates
-        total_temp_updates = await temp_work_updates.count_documents({})
-        pending_temp_updates = await temp_work_updates.count_documents({"status": "pending_followup"})
+        # Work updates
+        completed_followups = followup_counts.get(True, 0)
+        incomplete_followups = followup_counts.get(False, 0)
         
-        # Count sessions
-        total_sessions = await followup_sessions.count_documents({})
-        pending_sessions = await followup_sessions.count_documents({"status": "pending"})
-        completed_sessions = await followup_sessions.count_documents({"status": "completed"})
+        # Temporary work updates
+        pending_temp_updates = temp_status_counts.get("pending_followup", 0)
         
-        # Check TTL index status
-        ttl_status = await verify_ttl_index()
+        # Sessions
+        pending_sessions = session_status_counts.get("pending", 0)
+        completed_sessions = session_status_counts.get("completed", 0)
         
         stats = {
             "work_updates": {
@@ -323,51 +515,84 @@ async def get_database_stats():
         logger.error(f"Failed to get database stats: {e}")
         return None
 
+async def _bulk_set_followup_completed(work_updates, ids: list, completed: bool) -> int:
+    """Set followupCompleted on the given work update ids using batched bulk writes"""
+    modified_count = 0
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        ops = [
+            UpdateOne({"_id": _id}, {"$set": {"followupCompleted": completed}})
+            for _id in ids[start:start + BULK_BATCH_SIZE]
+        ]
+        result = await work_updates.bulk_write(ops, ordered=False)
+        modified_count += result.modified_count
+    return modified_count
+
 async def ensure_data_consistency():
     """Ensure data consistency between work updates and follow-up sessions"""
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        work_updates = database.work_updates
+        followup_sessions = database.followup_sessions
         
         inconsistency_count = 0
         
         # Find work updates marked as complete but without completed sessions
-        work_updates_cursor = work_updates.find({"followupCompleted": True})
-        async for work_update in work_updates_cursor:
-            work_update_id = str(work_update["_id"])
-            
-            # Check if there's a completed session for this work update
-            completed_session = await followup_sessions.find_one({
-                "workUpdateId": work_update_id,
-                "status": "completed"
-            })
-            
-            if not completed_session:
-                # Mark work update as incomplete
-                await work_updates.update_one(
-                    {"_id": work_update["_id"]},
-                    {"$set": {"followupCompleted": False}}
-                )
-                inconsistency_count += 1
+        missing_session_pipeline = [
+            {"$match": {"followupCompleted": True}},
+            {"$lookup": {
+                "from": Config.FOLLOWUP_SESSIONS_COLLECTION,
+                "let": {"workUpdateId": {"$toString": "$_id"}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$workUpdateId", "$$workUpdateId"]},
+                        {"$eq": ["$status", "completed"]}
+                    ]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "completedSessions"
+            }},
+            {"$match": {"completedSessions": {"$size": 0}}},
+            {"$project": {"_id": 1}}
+        ]
         
         # Find completed sessions but work updates marked as incomplete
-        completed_sessions_cursor = followup_sessions.find({"status": "completed"})
-        async for session in completed_sessions_cursor:
-            work_update_id = session.get("workUpdateId")
-            if work_update_id:
-                try:
-                    # Check work update status
-                    work_update = await work_updates.find_one({"_id": ObjectId(work_update_id)})
-                    if work_update and not work_update.get("followupCompleted", False):
-                        # Mark work update as complete
-                        await work_updates.update_one(
-                            {"_id": ObjectId(work_update_id)},
-                            {"$set": {"followupCompleted": True}}
-                        )
-                        inconsistency_count += 1
-                except:
-                    # Invalid ObjectId, skip
-                    continue
+        unmarked_update_pipeline = [
+            {"$match": {"status": "completed", "workUpdateId": {"$exists": True, "$ne": None}}},
+            {"$addFields": {
+                # Invalid ObjectId strings are skipped
+                "workUpdateOid": {"$convert": {"input": "$workUpdateId", "to": "objectId", "onError": None, "onNull": None}}
+            }},
+            {"$lookup": {
+                "from": Config.WORK_UPDATES_COLLECTION,
+                "localField": "workUpdateOid",
+                "foreignField": "_id",
+                "as": "workUpdate"
+            }},
+            {"$unwind": "$workUpdate"},
+            {"$match": {"workUpdate.followupCompleted": {"$ne": True}}},
+            {"$group": {"_id": "$workUpdate._id"}}
+        ]
+        
+        # The two result sets are disjoint (with vs. without a completed session),
+        # so both scans run concurrently
+        incomplete_cursor, complete_cursor = await asyncio.gather(
+            work_updates.aggregate(missing_session_pipeline, batchSize=SCAN_BATCH_SIZE),
+            followup_sessions.aggregate(unmarked_update_pipeline, batchSize=SCAN_BATCH_SIZE)
+        )
+        incomplete_docs, complete_docs = await asyncio.gather(
+            incomplete_cursor.to_list(None),
+            complete_cursor.to_list(None)
+        )
+        
+        # Mark work updates without a completed session as incomplete
+        inconsistency_count += await _bulk_set_followup_completed(
+            work_updates, [doc["_id"] for doc in incomplete_docs], False
+        )
+        
+        # Mark work updates with a completed session as complete
+        inconsistency_count += await _bulk_set_followup_completed(
+            work_updates, [doc["_id"] for doc in complete_docs], True
+        )
         
         if inconsistency_count > 0:
             logger.info(f"Fixed {inconsistency_count} data consistency issues")
@@ -377,52 +602,95 @@ async def ensure_data_consistency():
     except Exception as e:
         logger.warning(f"Failed to check data consistency: {e}")
 
+async def try_acquire_lock(name: str, owner: str, ttl_seconds: int) -> bool:
+    """Try to take a cross-process advisory lock stored in the meta collection.
+
+    The lock is granted when it is free, expired, or already held by the same owner,
+    and is held for ttl_seconds.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        # Upserting a held lock collides with the existing _id, so only one owner wins
+        await database.database[META_COLLECTION].update_one(
+            {"_id": name, "$or": [{"expiresAt": {"$lte": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expiresAt": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+    except Exception as e:
+        logger.warning(f"Failed to acquire lock {name}: {e}")
+        return False
+
 def get_database():
     """Get database instance"""
     return database.database
 
 def get_temp_collection():
     """Get temporary work updates collection"""
-    return database.database[TEMP_WORK_UPDATES_COLLECTION]
+    return database.temp_work_updates
+
+def get_work_updates_collection():
+    """Get permanent work updates collection"""
+    return database.work_updates
+
+def get_followup_sessions_collection():
+    """Get follow-up sessions collection"""
+    return database.followup_sessions
+
+def get_followup_batch_sessions_collection():
+    """Get batch-generated follow-up sessions collection"""
+    return database.followup_batch_sessions
+
+def get_followup_sessions_read_collection():
+    """Get follow-up sessions collection for read-only queries (may lag slightly behind writes)"""
+    return database.followup_sessions_read
 
 async def create_temp_work_update(work_update_data: dict) -> str:
     """Create temporary work update"""
     try:
         temp_collection = get_temp_collection()
         
-        # Check for existing temp update for same user and date
-        existing_temp = await temp_collection.find_one({
-            "userId": work_update_data["userId"],
-            "update_date": work_update_data["update_date"]
-        })
-        
-        if existing_temp:
-            # Replace existing temp update
-            await temp_collection.replace_one(
-                {"_id": existing_temp["_id"]},
-                work_update_data
-            )
-            return str(existing_temp["_id"])
-        else:
-            # Create new temp update
-            result = await temp_collection.insert_one(work_update_data)
-            return str(result.inserted_id)
+        # Replace existing temp update for same user and date, or create a new one,
+        # atomically in a single round-trip (relies on the unique userId+update_date index)
+        temp_update = await temp_collection.find_one_and_replace(
+            {
+                "userId": work_update_data["userId"],
+                "update_date": work_update_data["update_date"]
+            },
+            work_update_data,
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return str(temp_update["_id"])
             
     except Exception as e:
         logger.error(f"Failed to create temp work update: {e}")
         raise
 
+# Temp work update fields read by the follow-up flow
+TEMP_UPDATE_PROJECTION = {"userId": 1, "update_date": 1, "description": 1, "challenges": 1, "plans": 1}
+
 async def get_temp_work_update(temp_id: str) -> dict:
-    """Get temporary work update by ID"""
+    """Get temporary work update by ID (only the fields used by the follow-up flow)"""
+    # Malformed ids can't match anything; skip the InvalidId exception path
+    if not ObjectId.is_valid(temp_id):
+        return None
+    
     try:
         temp_collection = get_temp_collection()
-        return await temp_collection.find_one({"_id": ObjectId(temp_id)})
+        return await temp_collection.find_one({"_id": ObjectId(temp_id)}, TEMP_UPDATE_PROJECTION)
     except Exception as e:
         logger.error(f"Failed to get temp work update: {e}")
         return None
 
 async def delete_temp_work_update(temp_id: str) -> bool:
     """Delete temporary work update"""
+    if not ObjectId.is_valid(temp_id):
+        return False
+    
     try:
         temp_collection = get_temp_collection()
         result = await temp_collection.delete_one({"_id": ObjectId(temp_id)})
@@ -433,11 +701,15 @@ async def delete_temp_work_update(temp_id: str) -> bool:
 
 async def move_temp_to_permanent(temp_id: str, additional_data: dict = None) -> str:
     """Move temporary work update to permanent collection"""
+    if not ObjectId.is_valid(temp_id):
+        raise ValueError("Temporary work update not found")
+    
     try:
         temp_collection = get_temp_collection()
-        work_updates_collection = database.database[Config.WORK_UPDATES_COLLECTION]
+        work_updates_collection = database.work_updates
         
-        # Get temp work update
+        # Read the temp work update; it is only deleted once the permanent copy is written,
+        # so a failure in between never loses the submission
         temp_update = await temp_collection.find_one({"_id": ObjectId(temp_id)})
         if not temp_update:
             raise ValueError("Temporary work update not found")
@@ -453,28 +725,26 @@ async def move_temp_to_permanent(temp_id: str, additional_data: dict = None) ->
         # Set completion status
         permanent_update["followupCompleted"] = True
         permanent_update["status"] = "completed"
-        permanent_update["completedAt"] = datetime.now()
-        
-        # Check for existing permanent update (override logic)
-        existing_permanent = await work_updates_collection.find_one({
-            "userId": permanent_update["userId"],
-            "update_date": permanent_update["update_date"]
-        })
-        
-        if existing_permanent:
-            # Override existing permanent work update
-            await work_updates_collection.replace_one(
-                {"_id": existing_permanent["_id"]},
-                permanent_update
-            )
-            permanent_id = str(existing_permanent["_id"])
-        else:
-            # Create new permanent work update
-            result = await work_updates_collection.insert_one(permanent_update)
-            permanent_id = str(result.inserted_id)
+        permanent_update["completedAt"] = datetime.now(timezone.utc)
+        
+        # Override any existing permanent update for the same user and date, or create
+        # a new one (relies on the unique userId+update_date index on work_updates)
+        permanent_doc = await work_updates_collection.find_one_and_replace(
+            {
+                "userId": permanent_update["userId"],
+                "update_date": permanent_update["update_date"]
+            },
+            permanent_update,
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        
+        # Permanent copy is in place; remove the temp work update
+        await temp_collection.delete_one({"_id": temp_update["_id"]})
         
-        # Delete temp work update (TTL will also handle this, but immediate cleanup is better)
-        await temp_collection.delete_one({"_id": ObjectId(temp_id)})
+        permanent_id = str(permanent_doc["_id"])
+        invalidate_work_update_data(permanent_id)
         
         logger.info(f"Moved temp work update {temp_id} to permanent {permanent_id}")
         return permanent_id
@@ -485,17 +755,31 @@ async def move_temp_to_permanent(temp_id: str, additional_data: dict = None) ->
 
 async def get_work_update_with_session(work_update_id: str):
     """Get work update along with its associated follow-up session"""
+    if not ObjectId.is_valid(work_update_id):
+        return None
+    
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
-        
-        # Get work update
-        work_update = await work_updates.find_one({"_id": ObjectId(work_update_id)})
-        if not work_update:
+        work_updates = database.work_updates
+        
+        # Get work update joined with its associated session in one round-trip
+        pipeline = [
+            {"$match": {"_id": ObjectId(work_update_id)}},
+            {"$lookup": {
+                "from": Config.FOLLOWUP_SESSIONS_COLLECTION,
+                "pipeline": [
+                    {"$match": {"workUpdateId": work_update_id}},
+                    {"$limit": 1}
+                ],
+                "as": "followupSessions"
+            }}
+        ]
+        results = await (await work_updates.aggregate(pipeline)).to_list(1)
+        if not results:
             return None
         
-        # Get associated session
-        session = await followup_sessions.find_one({"workUpdateId": work_update_id})
+        work_update = results[0]
+        sessions = work_update.pop("followupSessions")
+        session = sessions[0] if sessions else None
         
         # Convert ObjectIds to strings
         if work_update.get("_id"):
@@ -519,34 +803,39 @@ async def get_work_update_with_session(work_update_id: str):
 async def get_user_incomplete_work_updates_with_sessions(user_id: str):
     """Get incomplete work updates along with their pending sessions"""
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
-        followup_sessions = database.database[Config.FOLLOWUP_SESSIONS_COLLECTION]
-        
-        # Get incomplete work updates
-        cursor = work_updates.find(
-            {"userId": user_id, "followupCompleted": False}
-        ).sort("submittedAt", DESCENDING)
-        
-        incomplete_updates = await cursor.to_list(length=10)
-        
-        # Get associated pending sessions
-        for update in incomplete_updates:
-            update_id = str(update["_id"])
-            update["id"] = update_id
-            del update["_id"]
-            
-            # Find associated session
-            session = await followup_sessions.find_one({
-                "workUpdateId": update_id,
-                "status": "pending"
-            })
+        work_updates = database.work_updates
+        
+        # Get the 10 newest incomplete work updates joined with their pending session
+        pipeline = [
+            {"$match": {"userId": user_id, "followupCompleted": False}},
+            {"$sort": {"submittedAt": DESCENDING}},
+            {"$limit": 10},
+            {"$lookup": {
+                "from": Config.FOLLOWUP_SESSIONS_COLLECTION,
+                "let": {"workUpdateId": {"$toString": "$_id"}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$workUpdateId", "$$workUpdateId"]},
+                        {"$eq": ["$status", "pending"]}
+                    ]}}},
+                    {"$limit": 1}
+                ],
+                "as": "pending_session"
+            }},
+            {"$addFields": {"pending_session": {"$arrayElemAt": ["$pending_session", 0]}}}
+        ]
+        
+        incomplete_updates = []
+        async for update in await work_updates.aggregate(pipeline):
+            update["id"] = str(update.pop("_id"))
             
+            session = update.get("pending_session")
             if session:
-                session["sessionId"] = session["_id"]
-                del session["_id"]
-                update["pending_session"] = session
+                session["sessionId"] = session.pop("_id")
             else:
                 update["pending_session"] = None
+            
+            incomplete_updates.append(update)
         
         return incomplete_updates
         
@@ -554,18 +843,34 @@ async def get_user_incomplete_work_updates_with_sessions(user_id: str):
         logger.error(f"Failed to get incomplete updates with sessions: {e}")
         return []
 
+def invalidate_work_update_data(work_update_id: str) -> None:
+    """Drop cached AI prompt data for a work update after it is written"""
+    _work_update_data_cache.pop(work_update_id, None)
+
 async def get_work_update_data(user_id: str, work_update_id: str = None):
     """Get work update data including challenges and plans for AI processing"""
+    if work_update_id and not ObjectId.is_valid(work_update_id):
+        return None
+    
     try:
-        work_updates = database.database[Config.WORK_UPDATES_COLLECTION]
+        if work_update_id:
+            cached = _work_update_data_cache.get(work_update_id)
+            if cached is not None:
+                return dict(cached)
+        
+        work_updates = database.work_updates
+        
+        # Only the fields needed for AI processing
+        projection = {"description": 1, "challenges": 1, "plans": 1, "userId": 1, "submittedAt": 1}
         
         if work_update_id:
             # Get specific work update
-            work_update = await work_updates.find_one({"_id": ObjectId(work_update_id)})
+            work_update = await work_updates.find_one({"_id": ObjectId(work_update_id)}, projection)
         else:
             # Get latest work update for user
             work_update = await work_updates.find_one(
                 {"userId": user_id},
+                projection,
                 sort=[("submittedAt", DESCENDING)]
             )
         
@@ -581,6 +886,9 @@ async def get_work_update_data(user_id: str, work_update_id: str = None):
             "submitted_at": work_update.get("submittedAt")
         }
         
+        if work_update_id:
+            _work_update_data_cache[work_update_id] = dict(data)
+        
         return data
         
     except Exception as e:
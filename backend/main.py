@@ -1,21 +1,29 @@
 import uuid
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 import logging
 from typing import List
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import asyncio
+import time
+import orjson
 
 from config import Config
 from database import (
     connect_to_mongo, close_mongo_connection, get_database, get_work_update_data,
     create_temp_work_update, get_temp_work_update, delete_temp_work_update,
     move_temp_to_permanent, cleanup_abandoned_temp_updates, get_database_stats,
+    get_work_updates_collection, get_followup_sessions_collection,
+    get_followup_sessions_read_collection, invalidate_work_update_data,
+    try_acquire_lock,
     verify_ttl_index  # Import TTL verification function
 )
-from ai_service import AIFollowupService
+from ai_service import AIFollowupService, get_ai_followup_service
 from models import (
     GenerateQuestionsRequest, GenerateQuestionsResponse, 
     FollowupAnswersUpdate, AnalysisResponse, TestAIResponse, 
@@ -29,61 +37,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global variable to control the cleanup task
-cleanup_task = None
+# Identifies this worker process when taking the cross-worker cleanup lock
+WORKER_ID = uuid.uuid4().hex
+
+# Set when temp work updates are written; wakes the backup cleanup task
+temp_updates_written = asyncio.Event()
+
+# Minimum time between backup cleanup runs
+CLEANUP_MIN_INTERVAL_SECONDS = 3600
 
 async def scheduled_cleanup_task():
-    """Background task that runs cleanup every hour (backup to TTL)"""
+    """Background task that cleans up temp updates after temp writes, at most once per hour
+
+    Only started when the TTL index is missing; otherwise MongoDB expires temp updates itself.
+    """
+    last_run = None
     while True:
+        # Sleep until temp work updates have been written since the last run
+        await temp_updates_written.wait()
+        if last_run is not None:
+            remaining = CLEANUP_MIN_INTERVAL_SECONDS - (time.monotonic() - last_run)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        temp_updates_written.clear()
+        last_run = time.monotonic()
+        
+        # Only one worker process runs the cleanup per interval
+        if not await try_acquire_lock("cleanup_lock", WORKER_ID, CLEANUP_MIN_INTERVAL_SECONDS):
+            logger.info("Scheduled cleanup skipped: another worker holds the cleanup lock")
+            continue
+        
         try:
-            logger.info("Running scheduled manual cleanup (backup to TTL)...")
-            
-            # Verify TTL is working
-            ttl_working = await verify_ttl_index()
-            
-            if ttl_working:
-                logger.info("TTL index is active - automatic deletion is working")
-                result = await cleanup_abandoned_temp_updates(25)  # Clean slightly older items as backup
-            else:
-                logger.warning("TTL index not found! Running manual cleanup more aggressively")
-                result = await cleanup_abandoned_temp_updates(24)  # Regular cleanup
+            logger.warning("TTL index not found! Running scheduled manual cleanup")
+            # Shield the lock-held cleanup from shutdown cancellation so it isn't cut off
+            # midway; finish it before letting the cancellation propagate
+            cleanup = asyncio.ensure_future(cleanup_abandoned_temp_updates(24))
+            try:
+                result = await asyncio.shield(cleanup)
+            except asyncio.CancelledError:
+                await cleanup
+                raise
             
             deleted_temp = result.get("deleted_temp_updates", 0)
             deleted_sessions = result.get("deleted_sessions", 0)
             
             if deleted_temp > 0 or deleted_sessions > 0:
-                cleanup_type = "backup" if ttl_working else "primary"
-                logger.info(f"Scheduled {cleanup_type} cleanup: Removed {deleted_temp} temp updates and {deleted_sessions} sessions")
+                logger.info(f"Scheduled cleanup: Removed {deleted_temp} temp updates and {deleted_sessions} sessions")
             else:
-                status = "TTL working properly" if ttl_working else "No items found"
-                logger.info(f"Scheduled cleanup: {status}")
+                logger.info("Scheduled cleanup: No items found")
                 
         except Exception as e:
             logger.error(f"Error in scheduled cleanup: {e}")
-        
-        # Wait for 1 hour before next cleanup
-        await asyncio.sleep(3600)  # 3600 seconds = 1 hour
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global cleanup_task
+    app.state.cleanup_task = None
     
     # Startup
     try:
-        Config.validate_config()
         await connect_to_mongo()
         
+        # Create the shared AI service up front so the first request doesn't pay for it
+        get_ai_followup_service()
+        
         # Verify TTL index is working
         ttl_status = await verify_ttl_index()
         if ttl_status:
+            # MongoDB's TTL monitor expires temp updates in small batches; no scheduled deletes
             logger.info("✅ TTL index verified - automatic cleanup is active")
         else:
             logger.warning("⚠️ TTL index not found - relying on manual cleanup")
-        
-        # Start the background cleanup task (as backup to TTL)
-        cleanup_task = asyncio.create_task(scheduled_cleanup_task())
-        logger.info("Background cleanup task started (backup to TTL)")
+            
+            # Start the background cleanup task; run once for anything left over
+            # from before this start
+            temp_updates_written.set()
+            app.state.cleanup_task = asyncio.create_task(scheduled_cleanup_task())
+            logger.info("Background cleanup task started")
         
         logger.info("Application started successfully")
     except Exception as e:
@@ -93,6 +123,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    cleanup_task = app.state.cleanup_task
     if cleanup_task:
         cleanup_task.cancel()
         try:
@@ -108,7 +139,8 @@ app = FastAPI(
     title="Intern Management AI Service",
     description="AI-powered follow-up question generation and analysis for intern management with automatic TTL cleanup",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -116,14 +148,21 @@ app.add_middleware(
     allow_origins=["http://localhost:3000","http://127.0.0.1:3000"],  
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],  
-    allow_headers=["*"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "If-None-Match"],
+    expose_headers=["ETag"],  # Let browser clients read ETags for conditional polling
+    max_age=600,  # Let browsers cache preflight responses for 10 minutes
 )
 
+def cleanup_task_running() -> bool:
+    """Whether this worker's background cleanup task is alive"""
+    cleanup_task = getattr(app.state, "cleanup_task", None)
+    return cleanup_task is not None and not cleanup_task.done()
+
 # Dependency to get AI service
 async def get_ai_service() -> AIFollowupService:
-    """Get AI service instance"""
+    """Get shared AI service instance"""
     try:
-        return AIFollowupService()
+        return get_ai_followup_service()
     except Exception as e:
         logger.error(f"Failed to initialize AI service: {e}")
         raise HTTPException(
@@ -140,7 +179,7 @@ async def root():
         "version": "1.0.0",
         "status": "running",
         "ttl_cleanup": "active" if ttl_status else "manual_only",
-        "cleanup_task_status": "running" if cleanup_task and not cleanup_task.done() else "stopped"
+        "cleanup_task_status": "running" if cleanup_task_running() else "stopped"
     }
 
 @app.get("/health")
@@ -148,18 +187,18 @@ async def health_check():
     """Health check endpoint with TTL status"""
     try:
         db = get_database()
-        # Test database connection
-        await db.command("ping")
-        
-        # Check TTL status
-        ttl_working = await verify_ttl_index()
+        # Test database connection and check TTL status concurrently
+        _, ttl_working = await asyncio.gather(
+            db.command("ping"),
+            verify_ttl_index()
+        )
         
         return {
             "status": "healthy",
             "database": "connected",
             "ttl_index": "active" if ttl_working else "not_found",
             "automatic_cleanup": "enabled" if ttl_working else "disabled",
-            "cleanup_task_running": cleanup_task and not cleanup_task.done(),
+            "cleanup_task_running": cleanup_task_running(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -178,14 +217,13 @@ async def get_stats():
     try:
         stats = await get_database_stats()
         
-        # Add cleanup task status to stats
-        ttl_status = await verify_ttl_index()
-        
         if stats:
+            # Add cleanup task status to stats (TTL status was already checked for the stats)
+            ttl_status = stats["ttl_index"]["active"]
             stats["cleanup_system"] = {
                 "ttl_index_active": ttl_status,
-                "manual_task_running": cleanup_task and not cleanup_task.done(),
-                "cleanup_frequency": "Every 1 hour (backup to TTL)",
+                "manual_task_running": cleanup_task_running(),
+                "cleanup_frequency": "On demand (TTL index)" if ttl_status else "At most every 1 hour",
                 "automatic_deletion": "24 hours via TTL index" if ttl_status else "Manual only"
             }
         
@@ -210,9 +248,9 @@ async def get_cleanup_status():
             "status": "Automatic deletion enabled" if ttl_active else "TTL index not found"
         },
         "manual_cleanup": {
-            "task_running": cleanup_task and not cleanup_task.done(),
-            "frequency": "Every 1 hour",
-            "purpose": "Backup to TTL + Session cleanup",
+            "task_running": cleanup_task_running(),
+            "frequency": "On demand" if ttl_active else "At most every 1 hour",
+            "purpose": "Fallback when the TTL index is missing + Session cleanup",
             "age_threshold": "24+ hours"
         },
         "recommendation": "TTL handles most cleanup automatically" if ttl_active else "Relying on manual cleanup only"
@@ -231,29 +269,35 @@ async def create_work_update(work_update: WorkUpdateCreate):
                     detail="Work update description is required when status is 'working'"
                 )
         
-        db = get_database()
-        today_date = datetime.now().strftime('%Y-%m-%d')
+        today_date = date.today().isoformat()
+        update_dict = work_update.model_dump(exclude={"id"})
+        update_dict["update_date"] = today_date
+        update_dict["submittedAt"] = datetime.now(timezone.utc)
         
         if work_update.work_status == WorkStatus.ON_LEAVE:
             # ON LEAVE: Save directly to permanent collection
-            work_updates_collection = db[Config.WORK_UPDATES_COLLECTION]
+            work_updates_collection = get_work_updates_collection()
             date_based_query = {"userId": work_update.userId, "update_date": today_date}
-            existing_update = await work_updates_collection.find_one(date_based_query)
 
-            update_dict = work_update.dict(exclude={"id"})
-            update_dict["update_date"] = today_date
-            update_dict["submittedAt"] = datetime.now()
             update_dict["followupCompleted"] = True  # No follow-up needed for leave
             update_dict["status"] = "completed"  
 
-            if existing_update:
-                await work_updates_collection.replace_one({"_id": existing_update["_id"]}, update_dict)
-                work_update_id = str(existing_update["_id"])
-                is_override = True
-            else:
-                result = await work_updates_collection.insert_one(update_dict)
-                work_update_id = str(result.inserted_id)
-                is_override = False
+            # Replace any existing update for today or insert a new one in a single atomic
+            # upsert; a fresh _id is only used on insert, which tells the two cases apart
+            new_id = ObjectId()
+            saved_update = await work_updates_collection.find_one_and_update(
+                date_based_query,
+                [{"$replaceWith": {"$mergeObjects": [
+                    {"_id": {"$ifNull": ["$_id", new_id]}},
+                    {"$literal": update_dict}
+                ]}}],
+                projection={"_id": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            work_update_id = str(saved_update["_id"])
+            is_override = saved_update["_id"] != new_id
+            invalidate_work_update_data(work_update_id)
 
             logger.info(f"ON LEAVE work update saved permanently: {work_update_id}")
             
@@ -268,14 +312,12 @@ async def create_work_update(work_update: WorkUpdateCreate):
         else:
             # WORKING: Save to TEMPORARY collection (pending follow-up)
             # TTL index will automatically delete after 24 hours
-            update_dict = work_update.dict(exclude={"id"})
-            update_dict["update_date"] = today_date
-            update_dict["submittedAt"] = datetime.now()
             update_dict["status"] = "pending_followup"  
             update_dict["followupCompleted"] = False
 
             # Use database function to create temp work update
             temp_work_update_id = await create_temp_work_update(update_dict)
+            temp_updates_written.set()
             
             logger.info(f"WORKING work update saved to temp collection (TTL: 24h): {temp_work_update_id}")
             
@@ -305,18 +347,33 @@ async def start_followup_session(
 ):
     """Start follow-up session using temporary work update data"""
     try:
-        db = get_database()
-        followup_collection = db[Config.FOLLOWUP_SESSIONS_COLLECTION]
-
-        # Get TEMPORARY work update data using database function
-        temp_work_update = await get_temp_work_update(temp_work_update_id)
+        followup_collection = get_followup_sessions_collection()
+
+        # Get TEMPORARY work update data and any session already started for it
+        temp_work_update, existing_session = await asyncio.gather(
+            get_temp_work_update(temp_work_update_id),
+            followup_collection.find_one(
+                {"tempWorkUpdateId": temp_work_update_id, "status": SessionStatus.PENDING},
+                {"questions": 1}
+            )
+        )
         if not temp_work_update:
             raise HTTPException(
                 status_code=404, 
                 detail="Temporary work update not found (may have been auto-deleted after 24h)"
             )
 
-        today_date = datetime.now().strftime('%Y-%m-%d')
+        # Retries and double submits reuse the pending session instead of calling the AI again
+        if existing_session:
+            logger.info(f"Resuming follow-up session {existing_session['_id']} for temp work update: {temp_work_update_id}")
+            return {
+                "message": "Follow-up session started",
+                "sessionId": existing_session["_id"],
+                "questions": existing_session["questions"],
+                "reminder": "Complete within 24 hours before auto-deletion"
+            }
+
+        today_date = date.today().isoformat()
         session_date_id = f"{user_id}_{uuid.uuid4().hex}"
 
         # Generate questions using temp data
@@ -336,10 +393,18 @@ async def start_followup_session(
             "questions": questions,
             "answers": [""] * len(questions),
             "status": SessionStatus.PENDING,
-            "createdAt": datetime.now(),
+            "createdAt": datetime.now(timezone.utc),
             "completedAt": None
         }
-        await followup_collection.replace_one({"_id": session_date_id}, session_doc, upsert=True)
+        # New session ids are unique, so a plain insert is enough; the unique
+        # (userId, session_date) index rejects a second session for the same day
+        try:
+            await followup_collection.insert_one(session_doc)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=409,
+                detail="A follow-up session already exists for today"
+            )
 
         logger.info(f"Follow-up session started with temp work update: {temp_work_update_id}")
 
@@ -367,41 +432,42 @@ async def complete_followup_session(
 ):
     """Complete follow-up session and move temp work update to permanent collection"""
     try:
-        # Validate all answers provided
-        if not answers_update.answers or len(answers_update.answers) != 3:
-            raise HTTPException(
-                status_code=400,
-                detail="All 3 questions must be answered"
-            )
-        
-        # Check if any answer is empty
-        if any(not answer.strip() for answer in answers_update.answers):
-            raise HTTPException(
-                status_code=400,
-                detail="All questions must have non-empty answers"
-            )
-        
-        db = get_database()
-        followup_collection = db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        # Answers are validated by FollowupAnswersUpdate
+        followup_collection = get_followup_sessions_collection()
         
         # Get the follow-up session
-        session = await followup_collection.find_one({"_id": session_id})
+        session = await followup_collection.find_one({"_id": session_id}, {"tempWorkUpdateId": 1})
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
+        
+        temp_work_update_id = session.get("tempWorkUpdateId")
+        if not temp_work_update_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Session has no temporary work update to finalize"
+            )
 
-        # Get the temporary work update using database function
-        temp_work_update = await get_temp_work_update(session["tempWorkUpdateId"])
-        if not temp_work_update:
+        completed_at = datetime.now(timezone.utc)
+
+        # MOVE temp work update to permanent collection using database function; the
+        # move reads the temp update itself, so a missing one is reported from there
+        try:
+            final_work_update_id = await move_temp_to_permanent(
+                temp_work_update_id,
+                {"completedAt": completed_at}
+            )
+        except ValueError:
             raise HTTPException(
                 status_code=404, 
                 detail="Temporary work update not found (may have been auto-deleted due to TTL expiry)"
             )
 
-        # Complete the follow-up session
+        # Complete the follow-up session and link it to the permanent work update
         session_update = {
             "answers": answers_update.answers,
             "status": SessionStatus.COMPLETED,
-            "completedAt": datetime.now()
+            "completedAt": completed_at,
+            "workUpdateId": final_work_update_id
         }
         
         await followup_collection.update_one(
@@ -409,18 +475,6 @@ async def complete_followup_session(
             {"$set": session_update}
         )
 
-        # MOVE temp work update to permanent collection using database function
-        final_work_update_id = await move_temp_to_permanent(
-            session["tempWorkUpdateId"],
-            {"completedAt": datetime.now()}
-        )
-
-        # Update session with permanent work update ID
-        await followup_collection.update_one(
-            {"_id": session_id},
-            {"$set": {"workUpdateId": final_work_update_id}}
-        )
-
         logger.info(f"Follow-up completed, work update finalized: {final_work_update_id}")
         
         return {
@@ -466,19 +520,42 @@ async def cleanup_abandoned_temp_updates_endpoint():
             detail=f"Failed to cleanup: {str(e)}"
         )
 
+def session_etag(session_id: str, session: dict) -> str:
+    """Weak ETag for a follow-up session; its content only changes when it is completed"""
+    completed_at = session.get("completedAt")
+    version = completed_at.isoformat() if completed_at else "pending"
+    return f'W/"{session_id}:{session.get("status")}:{version}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check per RFC 9110: a list of entity tags or "*", compared weakly"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
 # Get specific follow-up session
 @app.get("/api/followup/session/{session_id}")
-async def get_followup_session(session_id: str):
+async def get_followup_session(session_id: str, request: Request, response: Response):
     """Get specific follow-up session details"""
     try:
-        db = get_database()
-        followup_collection = db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        followup_collection = get_followup_sessions_read_collection()
         
         session = await followup_collection.find_one({"_id": session_id})
         
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
+        # Polling clients: answer 304 when nothing changed since their last fetch
+        etag = session_etag(session_id, session)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
+        
         # Convert ObjectId to string for JSON serialization
         session["sessionId"] = session["_id"]
         if "_id" in session:
@@ -503,26 +580,61 @@ async def get_followup_sessions(
 ):
     """Get follow-up sessions for a user"""
     try:
-        db = get_database()
-        followup_collection = db[Config.FOLLOWUP_SESSIONS_COLLECTION]
+        followup_collection = get_followup_sessions_read_collection()
         
-        cursor = followup_collection.find(
-            {"userId": user_id}
-        ).sort("createdAt", -1).skip(skip).limit(limit)
+        # Newest sessions first (served by the userId+createdAt index), with the
+        # id fields renamed for JSON serialization server-side
+        pipeline = [
+            {"$match": {"userId": user_id}},
+            {"$sort": {"createdAt": -1}},
+            {"$skip": skip}
+        ]
+        # $limit rejects 0, which used to mean "no limit" for cursor.limit()
+        if limit > 0:
+            pipeline.append({"$limit": limit})
+        pipeline += [
+            {"$addFields": {"id": {"$toString": "$_id"}, "sessionId": "$_id"}},
+            {"$project": {"_id": 0}}
+        ]
         
-        sessions = await cursor.to_list(length=limit)
+        if limit > 0:
+            # Bounded pages are small enough to build in full, which keeps errors out of a 200
+            cursor = await followup_collection.aggregate(pipeline)
+            sessions = await cursor.to_list(length=None)
+            return {
+                "sessions": sessions,
+                "count": len(sessions)
+            }
         
-        # Convert ObjectId to string for JSON serialization
-        for session in sessions:
-            if "_id" in session:
-                session["id"] = str(session["_id"])
-                session["sessionId"] = session["_id"]
-                del session["_id"]
+        async def stream_sessions():
+            # Encode each session as it arrives instead of materializing the whole list;
+            # the cursor lives inside the generator so it is closed however the stream ends
+            cursor = await followup_collection.aggregate(pipeline)
+            try:
+                count = 0
+                chunk = b'{"sessions":['
+                async for session in cursor:
+                    yield chunk
+                    chunk = (b"," if count else b"") + orjson.dumps(session, default=str)
+                    count += 1
+                yield chunk + b'],"count":' + str(count).encode() + b"}"
+            finally:
+                await cursor.close()
         
-        return {
-            "sessions": sessions,
-            "count": len(sessions)
-        }
+        # Run the query up to the first session before committing to a 200, so query
+        # errors still surface as a 500 instead of a truncated body
+        sessions_stream = stream_sessions()
+        first_chunk = await anext(sessions_stream)
+        
+        async def response_body():
+            try:
+                yield first_chunk
+                async for chunk in sessions_stream:
+                    yield chunk
+            finally:
+                await sessions_stream.aclose()
+        
+        return StreamingResponse(response_body(), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error getting followup sessions: {e}")
@@ -535,21 +647,28 @@ async def get_followup_sessions(
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc: HTTPException):
     """Handle HTTP exceptions"""
-    return {
-        "error": "HTTP_ERROR",
-        "message": exc.detail,
-        "status_code": exc.status_code
-    }
+    return ORJSONResponse(
+        {
+            "error": "HTTP_ERROR",
+            "message": exc.detail,
+            "status_code": exc.status_code
+        },
+        status_code=exc.status_code,
+        headers=exc.headers
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc: Exception):
     """Handle general exceptions"""
     logger.error(f"Unhandled exception: {exc}")
-    return {
-        "error": "INTERNAL_ERROR", 
-        "message": "An internal error occurred",
-        "details": str(exc) if Config.DEBUG else None
-    }
+    return ORJSONResponse(
+        {
+            "error": "INTERNAL_ERROR", 
+            "message": "An internal error occurred",
+            "details": str(exc) if Config.DEBUG else None
+        },
+        status_code=500
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -559,5 +678,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=Config.DEBUG,
+        workers=1 if Config.DEBUG else Config.UVICORN_WORKERS,
         log_level="info"
     )
\ No newline at end of file
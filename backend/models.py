@@ -1,7 +1,7 @@
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 class SessionStatus(str, Enum):
@@ -19,7 +19,7 @@ class WorkUpdateCreate(BaseModel):
     description: Optional[str] = None  
     challenges: Optional[str] = None 
     plans: Optional[str] = None  
-    submittedAt: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    submittedAt: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
     update_date: Optional[str] = Field(default=None)  
 
 class WorkUpdate(WorkUpdateCreate):
@@ -30,9 +30,8 @@ class WorkUpdate(WorkUpdateCreate):
     # Track if followup was skipped due to leave
     followup_skipped: Optional[bool] = Field(default=False)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {datetime: lambda v: v.isoformat()}
+    # Pydantic v2 serializes datetimes to ISO 8601 natively
+    model_config = ConfigDict(populate_by_name=True)
 
 class FollowupSessionCreate(BaseModel):
     userId: str
@@ -40,7 +39,7 @@ class FollowupSessionCreate(BaseModel):
     questions: List[str]
     answers: Optional[List[str]] = Field(default_factory=list)
     status: SessionStatus = SessionStatus.PENDING
-    createdAt: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    createdAt: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
     completedAt: Optional[datetime] = None
     # Add date tracking for sessions
     session_date: Optional[str] = Field(default=None) 
@@ -48,13 +47,22 @@ class FollowupSessionCreate(BaseModel):
 class FollowupSession(FollowupSessionCreate):
     id: Optional[str] = Field(alias="_id")             
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {datetime: lambda v: v.isoformat()}
+    # Pydantic v2 serializes datetimes to ISO 8601 natively
+    model_config = ConfigDict(populate_by_name=True)
 
 class FollowupAnswersUpdate(BaseModel):
     answers: List[str]
 
+    @field_validator("answers")
+    @classmethod
+    def check_answers(cls, answers: List[str]) -> List[str]:
+        # Rejected at parse time, before the completion handler runs
+        if len(answers) != 3:
+            raise ValueError("All 3 questions must be answered")
+        if not all(answer.strip() for answer in answers):
+            raise ValueError("All questions must have non-empty answers")
+        return answers
+
 class GenerateQuestionsRequest(BaseModel):
     userId: str
 
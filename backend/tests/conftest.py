@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Dummy values for required settings so backend modules import without a real environment
+os.environ.setdefault("GOOGLE_API_KEY", "test-api-key")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,123 @@
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("pymongo")
+
+from ai_service import AIFollowupService
+
+
+@pytest.fixture
+def service():
+    # Parsing doesn't touch the model or the database
+    return AIFollowupService.__new__(AIFollowupService)
+
+
+def test_parse_structured_questions_after_numbered_headings(service):
+    response = "\n".join(
+        f"{number}. **{topic} check**\n**Question Text**: What steps did you take for {topic}?"
+        for number, topic in [(1, "Progress"), (2, "Testing"), (3, "Plans")]
+    )
+
+    assert service._parse_questions_from_response(response) == [
+        "What steps did you take for Progress?",
+        "What steps did you take for Testing?",
+        "What steps did you take for Plans?",
+    ]
+
+
+def test_parse_numbered_questions(service):
+    response = (
+        "1. What did you finish on the login page today?\n"
+        "2. How did you test the API endpoint you built?\n"
+        "3) Did the work match your plan from yesterday?"
+    )
+
+    assert service._parse_questions_from_response(response) == [
+        "What did you finish on the login page today?",
+        "How did you test the API endpoint you built?",
+        "Did the work match your plan from yesterday?",
+    ]
+
+
+
+class FakeSessionCollection:
+    """In-memory stand-in enforcing the unique (userId, session_date) index"""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    async def insert_one(self, doc):
+        from pymongo.errors import DuplicateKeyError
+
+        key = (doc["userId"], doc.get("session_date"))
+        if any((d["userId"], d.get("session_date")) == key for d in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.docs.append(doc)
+
+    async def distinct(self, field, query):
+        return sorted({
+            d[field] for d in self.docs
+            if d["userId"] in query["userId"]["$in"] and d.get("session_date") == query["session_date"]
+        })
+
+
+@pytest.fixture
+def batch_env(service, monkeypatch):
+    import ai_service
+
+    interactive, batch = FakeSessionCollection(), FakeSessionCollection()
+    monkeypatch.setattr(ai_service, "get_followup_sessions_collection", lambda: interactive)
+    monkeypatch.setattr(ai_service, "get_followup_batch_sessions_collection", lambda: batch)
+
+    generated = []
+
+    async def fake_generate(user_id, interactive=True):
+        generated.append(user_id)
+        return service._get_default_questions()
+
+    monkeypatch.setattr(service, "generate_followup_questions", fake_generate)
+    return interactive, batch, generated
+
+
+def test_batch_twice_for_same_user_skips_second_run(service, batch_env):
+    import asyncio
+
+    _, batch, generated = batch_env
+
+    first = asyncio.run(service.generate_followup_questions_batch(["user-1"]))
+    second = asyncio.run(service.generate_followup_questions_batch(["user-1"]))
+
+    assert list(first) == ["user-1"]
+    assert second == {}
+    assert generated == ["user-1"]
+    assert len(batch.docs) == 1
+    assert batch.docs[0]["session_date"] is not None
+
+
+def test_batch_skips_user_with_interactive_session_today(service, batch_env):
+    import asyncio
+    from datetime import date
+
+    interactive, batch, generated = batch_env
+    interactive.docs.append({"userId": "user-1", "session_date": date.today().isoformat()})
+
+    result = asyncio.run(service.generate_followup_questions_batch(["user-1", "user-2"]))
+
+    assert list(result) == ["user-2"]
+    assert generated == ["user-2"]
+    assert len(interactive.docs) == 1
+
+
+def test_yesterday_plans_use_local_update_date(service):
+    from datetime import date, datetime, timedelta, timezone
+
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    docs = [
+        # submittedAt may fall on another UTC day; update_date is the local day it was saved under
+        {"plans": "Today's plan", "update_date": date.today().isoformat(),
+         "submittedAt": datetime.now(timezone.utc) - timedelta(days=1)},
+        {"plans": "Ship the login page", "update_date": yesterday,
+         "submittedAt": datetime.now(timezone.utc)},
+    ]
+
+    assert service._extract_yesterday_plans_from_recent_docs(docs) == "Ship the login page"